@@ -0,0 +1,348 @@
+from typing import BinaryIO, Callable, List, Optional, Tuple
+from smsclient import REQUEST_ERRORS, SMSClient
+from response import HTTPResponse
+from config import Config, ConfigWatcher
+from sinks import SINKS, ResultSink, open_sink, result_record
+import argparse
+import asyncio
+import collections
+import csv
+import json
+import logging
+import os
+import re
+import sys
+
+E164 = re.compile(r'\+[1-9]\d{7,14}')
+_PUNCTUATION = str.maketrans('', '', ' -().\t')
+
+
+def normalize_numbers(numbers: List[Optional[str]], country_code: str = '7', trunk_prefix: Optional[str] = None) -> List[Optional[str]]:
+    """Normalize a batch of phone numbers to E.164, or None where invalid
+
+    Numbers without a "+" are taken as international with a "00" prefix,
+    as already carrying country_code, as national with the trunk prefix
+    ("8" for country code 7, "0" otherwise), or as bare 10-digit national
+    numbers.
+    """
+    if trunk_prefix is None:
+        trunk_prefix = '8' if country_code == '7' else '0'
+    international_length = len(country_code) + 10
+    normalized = []
+    for number in numbers:
+        number = str(number).translate(_PUNCTUATION) if number else ''
+        if number.startswith('00'):
+            number = '+' + number[2:]
+        elif not number.startswith('+'):
+            if len(number) == international_length and number.startswith(country_code):
+                number = '+' + number
+            elif len(number) == 10 + len(trunk_prefix) and number.startswith(trunk_prefix):
+                number = '+' + country_code + number[1:]
+            elif len(number) == 10:
+                number = '+' + country_code + number
+        normalized.append(number if E164.fullmatch(number) else None)
+    return normalized
+
+
+class CampaignReader:
+    """Lazily read campaign rows from a CSV or JSONL stream in batches
+
+    Only one batch is held in memory at a time. Byte offsets of batch ends
+    are tracked so that reading can resume after the last completed batch.
+    CSV input needs a header row and must not contain quoted line breaks.
+    """
+
+    format: str
+    batch_size: int
+    offset: int
+    _stream: BinaryIO
+    _header: Optional[List[str]] = None
+
+    def __init__(self, stream: BinaryIO, format: str, *, offset: int = 0, batch_size: int = 1000):
+        if format not in ('csv', 'jsonl'):
+            raise ValueError(f"Unknown campaign format: {format}")
+        self._stream = stream
+        self.format = format
+        self.batch_size = batch_size
+        self.offset = 0
+        if format == 'csv':
+            header = self._stream.readline()
+            self.offset = len(header)
+            # Excel exports often start with a UTF-8 byte order mark
+            self._header = next(csv.reader([header.decode('utf-8-sig', errors='replace')]), [])
+        self._skip_to(offset)
+
+    def _skip_to(self, offset: int) -> None:
+        if offset <= self.offset:
+            return
+        if self._stream.seekable():
+            self._stream.seek(offset)
+            self.offset = offset
+            return
+        while self.offset < offset:
+            chunk = self._stream.read(min(offset - self.offset, 1 << 16))
+            if not chunk:
+                break
+            self.offset += len(chunk)
+
+    def _parse(self, line: str) -> dict:
+        try:
+            if self.format == 'csv':
+                return dict(zip(self._header, next(csv.reader([line]))))
+            row = json.loads(line)
+            return row if isinstance(row, dict) else {}
+        except (ValueError, StopIteration):
+            return {}
+
+    def read_batch(self) -> Tuple[List[dict], int]:
+        """Read up to batch_size rows, returning them with the offset just past them"""
+        rows = []
+        while len(rows) < self.batch_size:
+            line = self._stream.readline()
+            if not line:
+                break
+            self.offset += len(line)
+            line = line.decode('utf-8-sig', errors='replace').strip()
+            if line:
+                rows.append(self._parse(line))
+        return rows, self.offset
+
+
+class Checkpoint:
+    """Input offset up to which every row has been sent, persisted atomically"""
+
+    path: str
+
+    def __init__(self, path: str):
+        self.path = path
+
+    def load(self) -> int:
+        """Offset to resume from, 0 if there is no checkpoint yet"""
+        try:
+            with open(self.path) as f:
+                return json.load(f)['offset']
+        except FileNotFoundError:
+            return 0
+
+    def save(self, offset: int) -> None:
+        """Record that every row before offset has been sent"""
+        temporary = self.path + '.tmp'
+        with open(temporary, 'w') as f:
+            json.dump({'offset': offset}, f)
+        os.replace(temporary, self.path)
+
+
+class CampaignStats:
+    """Counters of a campaign run"""
+
+    sent: int = 0
+    failed: int = 0
+    invalid: int = 0
+    retried: int = 0
+
+    def report(self) -> str:
+        """Format a human-readable summary"""
+        return f"Sent: {self.sent}, failed: {self.failed}, invalid: {self.invalid}, retried: {self.retried}"
+
+
+class CampaignAborted(Exception):
+    """A send kept failing, so the run stopped with the checkpoint before it"""
+
+    stats: CampaignStats
+
+    def __init__(self, message: str, stats: CampaignStats):
+        super().__init__(message)
+        self.stats = stats
+
+
+def _retryable(response: Optional[HTTPResponse]) -> bool:
+    """Whether a send may succeed if repeated: transport errors, 429 and 5xx"""
+    return response is None or response.status_code == 429 or response.status_code >= 500
+
+
+def _retry_delay(response: Optional[HTTPResponse], attempt: int, backoff: float) -> float:
+    """Seconds to wait before a retry, honouring Retry-After if the server sent one"""
+    if response is not None:
+        try:
+            return max(float(response.headers['Retry-After']), 0.0)
+        except (KeyError, ValueError):
+            pass
+    return backoff * 2 ** attempt
+
+
+class _Batch:
+    remaining: int
+    end_offset: int
+
+    def __init__(self, remaining: int, end_offset: int):
+        self.remaining = remaining
+        self.end_offset = end_offset
+
+
+async def _worker(config: Config, queue: asyncio.Queue, stats: CampaignStats, sink: Optional[ResultSink],
+                  watcher: Optional[ConfigWatcher], done: Callable[[_Batch], None], max_retries: int, backoff: float,
+                  timeout: float) -> None:
+    async with SMSClient(watcher.current if watcher is not None else config) as client:
+        if watcher is not None:
+            watcher.subscribe(client.reconfigure)
+        while True:
+            item = await queue.get()
+            if item is None:
+                if watcher is not None:
+                    watcher.unsubscribe(client.reconfigure)
+                return
+            batch, (sender, recipient, message) = item
+            for attempt in range(max_retries + 1):
+                response, error = None, None
+                try:
+                    response, _ = await asyncio.wait_for(client.request(sender, recipient, message), timeout)
+                except REQUEST_ERRORS as e:
+                    # Includes TimeoutError; the connection may be mid-response, so start afresh
+                    error = type(e).__name__
+                    try:
+                        await client.reconnect()
+                    except OSError as e:
+                        logging.info(f"Reconnect failed: {e}")
+                if error is None and not _retryable(response):
+                    break
+                if attempt < max_retries:
+                    delay = _retry_delay(response, attempt, backoff)
+                    logging.info(f"Send to {recipient} failed ({error or response.status_code}), retrying in {delay:.1f}s")
+                    stats.retried += 1
+                    await asyncio.sleep(delay)
+            else:
+                if sink is not None:
+                    await sink.awrite(result_record(sender, recipient, response, error))
+                raise CampaignAborted(f"Giving up on {recipient} after {max_retries + 1} attempts: "
+                                      f"{error or response.status_code}", stats)
+            # Anything left is a success or a permanent rejection of this row
+            if response.status_code >= 400:
+                stats.failed += 1
+            else:
+                stats.sent += 1
+            if sink is not None:
+                await sink.awrite(result_record(sender, recipient, response, error))
+            done(batch)
+
+
+async def run(config: Config, reader: CampaignReader, *, sender: str, message: Optional[str] = None,
+              connections: int = 8, sink: Optional[ResultSink] = None, checkpoint: Optional[Checkpoint] = None,
+              watcher: Optional[ConfigWatcher] = None, country_code: str = '7', trunk_prefix: Optional[str] = None,
+              max_retries: int = 5, backoff: float = 1.0, timeout: float = 30.0) -> CampaignStats:
+    """Send a message to every row of the campaign
+
+    Reading stalls while all connections are busy and the send queue is
+    full, so memory stays bounded however large the input is. The
+    checkpoint only advances past a batch once every row before it is done.
+
+    Transport errors, requests unanswered after timeout seconds, 429 and
+    5xx responses are retried up to max_retries times, waiting for
+    Retry-After or exponential backoff from backoff seconds. If a row still fails, CampaignAborted is raised and the
+    checkpoint stays before that row.
+    """
+    stats = CampaignStats()
+    queue = asyncio.Queue(maxsize=2 * connections)
+    pending = collections.deque()
+
+    def done(batch: Optional[_Batch] = None) -> None:
+        if batch is not None:
+            batch.remaining -= 1
+        offset = None
+        while pending and pending[0].remaining == 0:
+            offset = pending.popleft().end_offset
+        if offset is not None and checkpoint is not None:
+            checkpoint.save(offset)
+
+    async def produce() -> None:
+        while True:
+            rows, end_offset = await asyncio.to_thread(reader.read_batch)
+            if not rows:
+                break
+            recipients = normalize_numbers([row.get('recipient') for row in rows], country_code, trunk_prefix)
+            sends = []
+            for row, recipient in zip(rows, recipients):
+                text = row.get('message') or message
+                if recipient is None or not text:
+                    stats.invalid += 1
+                    if sink is not None:
+                        await sink.awrite(result_record(row.get('sender') or sender, row.get('recipient'), error='InvalidRow'))
+                    continue
+                sends.append((row.get('sender') or sender, recipient, text))
+            batch = _Batch(len(sends), end_offset)
+            pending.append(batch)
+            for send in sends:
+                await queue.put((batch, send))
+            done()
+        for _ in workers:
+            await queue.put(None)
+
+    workers = [asyncio.create_task(_worker(config, queue, stats, sink, watcher, done, max_retries, backoff, timeout)) for _ in range(connections)]
+    producer = asyncio.create_task(produce())
+    try:
+        await asyncio.gather(producer, *workers)
+    except BaseException:
+        # A dead worker must not leave the producer blocked on a full queue
+        for task in (producer, *workers):
+            task.cancel()
+        await asyncio.gather(producer, *workers, return_exceptions=True)
+        raise
+    return stats
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="SMS campaign sender")
+    parser.add_argument('-c', '--config', type=str, help="Path to config file", default="config.toml")
+    parser.add_argument('-i', '--input', type=str, help="CSV or JSONL file with a recipient column, - for stdin", default='-')
+    parser.add_argument('--input-format', type=str, help="Input format (default: from extension, csv for stdin)", choices=('csv', 'jsonl'))
+    parser.add_argument('-s', '--sender', type=str, help="Sender's phone number for rows without one", required=True)
+    parser.add_argument('-m', '--message', type=str, help="Message's body for rows without one")
+    parser.add_argument('-n', '--connections', type=int, help="Number of concurrent connections", default=8)
+    parser.add_argument('-b', '--batch-size', type=int, help="Rows read and checkpointed at a time", default=1000)
+    parser.add_argument('--checkpoint', type=str, help="File recording input progress, resumed from if it exists")
+    parser.add_argument('--max-retries', type=int, help="Retries of a send failing with a transport error, 429 or 5xx", default=5)
+    parser.add_argument('--backoff', type=float, help="Initial retry delay in seconds when there is no Retry-After", default=1.0)
+    parser.add_argument('-t', '--timeout', type=float, help="Seconds to wait for a response before retrying", default=30.0)
+    parser.add_argument('--country-code', type=str, help="Country code for national numbers", default='7')
+    parser.add_argument('--trunk-prefix', type=str, help="National trunk prefix (default: 8 for country code 7, 0 otherwise)")
+    parser.add_argument('-o', '--output', type=str, help="Append results to a file")
+    parser.add_argument('-f', '--format', type=str, help="Output file format (default: from extension)", choices=SINKS)
+    parser.add_argument('--reload-interval', type=float, help="Watch the config file for changes every N seconds")
+    parser.add_argument('-d', '--debug', help="Print debug messages", action='store_true')
+    args = parser.parse_args()
+    if args.debug:
+        logging.basicConfig(
+            format='%(asctime)s %(levelname)-8s %(message)s',
+            level=logging.DEBUG,
+            datefmt='%Y-%m-%d %H:%M:%S')
+    Config(args.config)
+    input_format = args.input_format or ('jsonl' if args.input.endswith('.jsonl') else 'csv')
+    checkpoint = Checkpoint(args.checkpoint) if args.checkpoint is not None else None
+    offset = checkpoint.load() if checkpoint is not None else 0
+    stream = sys.stdin.buffer if args.input == '-' else open(args.input, 'rb')
+    sink = open_sink(args.output, args.format) if args.output is not None else None
+    watcher = None
+    if args.reload_interval is not None:
+        watcher = ConfigWatcher(args.config, args.reload_interval)
+        watcher.start()
+    try:
+        reader = CampaignReader(stream, input_format, offset=offset, batch_size=args.batch_size)
+        if sink is not None:
+            sink.open()
+        stats = await run(Config, reader, sender=args.sender, message=args.message, connections=args.connections,
+                          sink=sink, checkpoint=checkpoint, watcher=watcher, country_code=args.country_code,
+                          trunk_prefix=args.trunk_prefix,
+                          max_retries=args.max_retries, backoff=args.backoff, timeout=args.timeout)
+    except CampaignAborted as e:
+        print(e.stats.report())
+        sys.exit(f"Campaign stopped: {e}")
+    finally:
+        if watcher is not None:
+            await watcher.stop()
+        if sink is not None:
+            await sink.aclose()
+        if stream is not sys.stdin.buffer:
+            stream.close()
+    print(stats.report())
+
+if __name__ == '__main__':
+    asyncio.run(main())
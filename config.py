@@ -1,3 +1,7 @@
+from typing import Callable, List, Optional, Self
+import asyncio
+import logging
+import os
 import toml
 
 class Config(object):
@@ -9,4 +13,120 @@ class Config(object):
     def __init__(cls, path: str = None):
         if path is not None:
             for section, options in toml.load(path).items():
-                setattr(Config, section, options)
\ No newline at end of file
+                setattr(Config, section, options)
+
+
+# Keys every config must provide, by section
+REQUIRED_KEYS = {
+    'server': ('address', 'port', 'hostname'),
+    'authorization': ('username', 'password'),
+    'http': ('version',),
+}
+
+
+class ConfigSnapshot:
+    """Config file contents at one point in time
+
+    Unlike Config, a snapshot lives on the instance, so a new one can be
+    swapped in with a single assignment while the old one stays consistent.
+    """
+
+    http: dict
+    server: dict
+    authorization: dict
+
+    def __init__(self, data: dict):
+        for section, keys in REQUIRED_KEYS.items():
+            options = data.get(section)
+            if not isinstance(options, dict):
+                raise ValueError(f"Missing config section [{section}]")
+            missing = [key for key in keys if key not in options]
+            if missing:
+                raise ValueError(f"Missing config keys in [{section}]: {', '.join(missing)}")
+        for section, options in data.items():
+            # Top-level scalars such as "debug = true" are kept as they are, like Config does
+            setattr(self, section, dict(options) if isinstance(options, dict) else options)
+
+    @staticmethod
+    def load(path: str) -> Self:
+        """Read a snapshot from a config file"""
+        return ConfigSnapshot(toml.load(path))
+
+
+class ConfigWatcher:
+    """Poll a config file and publish a new snapshot whenever it changes"""
+
+    path: str
+    interval: float
+    current: ConfigSnapshot
+    _callbacks: List[Callable[[ConfigSnapshot], None]]
+    _mtime: int
+    _failed_mtime: Optional[int] = None
+    _task: Optional[asyncio.Task] = None
+
+    def __init__(self, path: str, interval: float = 1.0):
+        self.path = path
+        self.interval = interval
+        self._mtime = os.stat(path).st_mtime_ns
+        self.current = ConfigSnapshot.load(path)
+        self._callbacks = []
+
+    def subscribe(self, callback: Callable[[ConfigSnapshot], None]) -> None:
+        """Call callback with every new snapshot"""
+        self._callbacks.append(callback)
+
+    def unsubscribe(self, callback: Callable[[ConfigSnapshot], None]) -> None:
+        """Stop calling callback"""
+        self._callbacks.remove(callback)
+
+    def check(self) -> bool:
+        """Reload the file if it changed, returning whether a new snapshot was published"""
+        mtime = None
+        try:
+            mtime = os.stat(self.path).st_mtime_ns
+            if mtime == self._mtime:
+                return False
+            snapshot = ConfigSnapshot.load(self.path)
+        except (OSError, ValueError) as e:
+            # Keep serving the last good snapshot, e.g. while an editor is mid-save.
+            # The file is read again on the next check, since the rest of the save
+            # may land within the same mtime tick.
+            if mtime is None or mtime != self._failed_mtime:
+                logging.warning(f"Config reload failed, keeping current config: {e}")
+            self._failed_mtime = mtime
+            return False
+        logging.info(f"Config reloaded from {self.path}")
+        self._mtime = mtime
+        self._failed_mtime = None
+        self.current = snapshot
+        for callback in list(self._callbacks):
+            try:
+                callback(snapshot)
+            except Exception:
+                logging.exception(f"Config subscriber {callback!r} failed")
+        return True
+
+    async def watch(self) -> None:
+        """Check for changes every interval until cancelled"""
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                self.check()
+            except Exception:
+                logging.exception(f"Config check of {self.path} failed")
+
+    def start(self) -> None:
+        """Start watching in the background"""
+        if self._task is None:
+            self._task = asyncio.create_task(self.watch())
+
+    async def stop(self) -> None:
+        """Stop watching"""
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
@@ -0,0 +1,229 @@
+from typing import Iterator, List, Optional, Tuple
+from smsclient import REQUEST_ERRORS, SMSClient
+from config import Config, ConfigWatcher
+import argparse
+import asyncio
+import itertools
+import json
+import logging
+import math
+import random
+import time
+
+
+def parse_profile(profile: str) -> List[Tuple[float, float]]:
+    """Parse a ramp profile of the form "rate:seconds,rate:seconds,..."
+
+    Each stage ramps linearly from the previous stage's rate (0 for the first
+    stage) to its own rate over the given number of seconds. Repeating a rate
+    holds it steady.
+    """
+    stages = []
+    for stage in profile.split(','):
+        rate, duration = stage.split(':')
+        rate, duration = float(rate), float(duration)
+        if rate < 0 or duration <= 0:
+            raise ValueError(f"Invalid profile stage: {stage}")
+        stages.append((rate, duration))
+    if not stages:
+        raise ValueError("Empty profile")
+    return stages
+
+
+def schedule(stages: List[Tuple[float, float]], start_rate: float = 0.0) -> Iterator[float]:
+    """Yield intended send offsets (in seconds) for an open-loop ramp profile"""
+    offset = 0.0
+    carry = 0.0
+    previous_rate = start_rate
+    for rate, duration in stages:
+        # Sends within a stage satisfy N(t) = r0*t + (r1-r0)*t^2/(2*D)
+        a = (rate - previous_rate) / (2 * duration)
+        b = previous_rate
+        total = b * duration + a * duration * duration
+        k = 1.0 - carry
+        while k <= total:
+            if a == 0:
+                t = k / b
+            else:
+                t = (-b + math.sqrt(b * b + 4 * a * k)) / (2 * a)
+            yield offset + t
+            k += 1.0
+        carry = total - (k - 1.0)
+        offset += duration
+        previous_rate = rate
+
+
+def percentile(sorted_values: List[float], p: float) -> float:
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return math.nan
+    rank = math.ceil(p / 100 * len(sorted_values))
+    return sorted_values[max(rank, 1) - 1]
+
+
+def replay_messages(path: str) -> Iterator[Tuple[str, str, str]]:
+    """Cycle through recorded sends stored as JSONL"""
+    with open(path) as f:
+        records = [json.loads(line) for line in f if line.strip()]
+    if not records:
+        raise ValueError(f"No records in {path}")
+    for record in itertools.cycle(records):
+        yield record['sender'], record['recipient'], record['message']
+
+
+def synthetic_messages(sender: str, message_size: int, seed: Optional[int] = None) -> Iterator[Tuple[str, str, str]]:
+    """Generate an endless stream of synthetic sends"""
+    rng = random.Random(seed)
+    while True:
+        recipient = '+7' + ''.join(rng.choices('0123456789', k=10))
+        message = ''.join(rng.choices('abcdefghijklmnopqrstuvwxyz ', k=message_size))
+        yield sender, recipient, message
+
+
+class LoadStats:
+    """Aggregated results of a load test run"""
+
+    latencies: List[float]
+    statuses: dict
+    errors: dict
+    started: float
+    finished: float
+
+    def __init__(self):
+        self.latencies = []
+        self.statuses = {}
+        self.errors = {}
+        self.started = 0.0
+        self.finished = 0.0
+
+    def record(self, latency: float, status_code: Optional[int] = None, error: Optional[str] = None) -> None:
+        """Record a completed send"""
+        self.latencies.append(latency)
+        if error is not None:
+            self.errors[error] = self.errors.get(error, 0) + 1
+        else:
+            self.statuses[status_code] = self.statuses.get(status_code, 0) + 1
+
+    @property
+    def total(self) -> int:
+        return len(self.latencies)
+
+    @property
+    def failed(self) -> int:
+        return sum(self.errors.values()) + sum(n for code, n in self.statuses.items() if code >= 400)
+
+    def report(self) -> str:
+        """Format a human-readable summary"""
+        elapsed = self.finished - self.started
+        latencies = sorted(self.latencies)
+        lines = [
+            f"Requests:   {self.total} in {elapsed:.2f}s",
+            f"Throughput: {self.total / elapsed if elapsed > 0 else 0:.1f} req/s",
+            f"Errors:     {self.failed} ({100 * self.failed / self.total if self.total else 0:.2f}%)",
+            "Latency (ms, coordinated-omission corrected):",
+        ]
+        for p in (50, 90, 99, 99.9, 100):
+            lines.append(f"  p{p:<5} {1000 * percentile(latencies, p):.2f}")
+        for code, n in sorted(self.statuses.items()):
+            lines.append(f"  HTTP {code}: {n}")
+        for error, n in sorted(self.errors.items()):
+            lines.append(f"  {error}: {n}")
+        return '\n'.join(lines)
+
+
+async def _worker(config: Config, queue: asyncio.Queue, stats: LoadStats, watcher: Optional[ConfigWatcher], timeout: float) -> None:
+    async with SMSClient(watcher.current if watcher is not None else config) as client:
+        if watcher is not None:
+            watcher.subscribe(client.reconfigure)
+        while True:
+            item = await queue.get()
+            if item is None:
+                if watcher is not None:
+                    watcher.unsubscribe(client.reconfigure)
+                return
+            intended, (sender, recipient, message) = item
+            try:
+                response, _ = await asyncio.wait_for(client.request(sender, recipient, message), timeout)
+            except REQUEST_ERRORS as e:
+                # Latency is measured from the intended send time, so queueing
+                # behind slow responses is not hidden from the percentiles
+                stats.record(time.perf_counter() - intended, error=type(e).__name__)
+                try:
+                    await client.reconnect()
+                except OSError as e:
+                    logging.info(f"Reconnect failed: {e}")
+            else:
+                stats.record(time.perf_counter() - intended, status_code=response.status_code)
+
+
+async def run(config: Config, stages: List[Tuple[float, float]], messages: Iterator[Tuple[str, str, str]], *, connections: int = 8, watcher: Optional[ConfigWatcher] = None, timeout: float = 30.0) -> LoadStats:
+    """Drive sends at the profile's open-loop rate over a number of connections
+
+    If a watcher is given, its snapshots take precedence over config and
+    are applied to every connection as they change. A request taking longer
+    than timeout seconds is recorded as a TimeoutError.
+    """
+    stats = LoadStats()
+    queue = asyncio.Queue()
+
+    async def produce() -> None:
+        for offset, message in zip(schedule(stages), messages):
+            intended = stats.started + offset
+            delay = intended - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            queue.put_nowait((intended, message))
+        for _ in workers:
+            queue.put_nowait(None)
+
+    workers = [asyncio.create_task(_worker(config, queue, stats, watcher, timeout)) for _ in range(connections)]
+    stats.started = time.perf_counter()
+    producer = asyncio.create_task(produce())
+    try:
+        await asyncio.gather(producer, *workers)
+    except BaseException:
+        # A dead worker must not leave the producer running out the profile
+        for task in (producer, *workers):
+            task.cancel()
+        await asyncio.gather(producer, *workers, return_exceptions=True)
+        raise
+    stats.finished = time.perf_counter()
+    return stats
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="SMS API load generator")
+    parser.add_argument('-c', '--config', type=str, help="Path to config file", default="config.toml")
+    parser.add_argument('-p', '--profile', type=str, help="Ramp profile as rate:seconds stages, e.g. 100:10,100:60", required=True)
+    parser.add_argument('-n', '--connections', type=int, help="Number of concurrent connections", default=8)
+    parser.add_argument('-t', '--timeout', type=float, help="Seconds to wait for a response", default=30.0)
+    parser.add_argument('-f', '--replay', type=str, help="JSONL file of recorded sends to replay")
+    parser.add_argument('-s', '--sender', type=str, help="Sender's phone number for synthetic traffic", default="+70000000000")
+    parser.add_argument('--message-size', type=int, help="Synthetic message length", default=70)
+    parser.add_argument('--seed', type=int, help="Random seed for synthetic traffic")
+    parser.add_argument('--reload-interval', type=float, help="Watch the config file for changes every N seconds")
+    parser.add_argument('-d', '--debug', help="Print debug messages", action='store_true')
+    args = parser.parse_args()
+    if args.debug:
+        logging.basicConfig(
+            format='%(asctime)s %(levelname)-8s %(message)s',
+            level=logging.DEBUG,
+            datefmt='%Y-%m-%d %H:%M:%S')
+    Config(args.config)
+    if args.replay is not None:
+        messages = replay_messages(args.replay)
+    else:
+        messages = synthetic_messages(args.sender, args.message_size, args.seed)
+    watcher = None
+    if args.reload_interval is not None:
+        watcher = ConfigWatcher(args.config, args.reload_interval)
+        watcher.start()
+    try:
+        stats = await run(Config, parse_profile(args.profile), messages, connections=args.connections, watcher=watcher, timeout=args.timeout)
+    finally:
+        if watcher is not None:
+            await watcher.stop()
+    print(stats.report())
+
+if __name__ == '__main__':
+    asyncio.run(main())
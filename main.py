@@ -1,5 +1,6 @@
 from smsclient import SMSClient
 from config import Config
+from sinks import SINKS, open_sink, result_record
 import argparse
 import asyncio
 import logging
@@ -10,6 +11,8 @@ async def main():
     parser.add_argument('-s', '--sender', type=str, help="Sender's phone number", required=True)
     parser.add_argument('-r', '--recipient', type=str, help="Recipient's phone number", required=True)
     parser.add_argument('-m', '--message', type=str, help="Message's body", required=True)
+    parser.add_argument('-o', '--output', type=str, help="Append the result to a file instead of printing it")
+    parser.add_argument('-f', '--format', type=str, help="Output file format (default: from extension)", choices=SINKS)
     parser.add_argument('-d', '--debug', help="Print debug messages", action='store_true')
     args = parser.parse_args()
     if args.debug:
@@ -19,6 +22,10 @@ async def main():
             datefmt='%Y-%m-%d %H:%M:%S')
     async with SMSClient(Config) as client:
         response, json = await client.request(args.sender, args.recipient, args.message)
+    if args.output is not None:
+        async with open_sink(args.output, args.format) as sink:
+            sink.write(result_record(args.sender, args.recipient, response))
+    else:
         print(f"[{response.status_code} {response.reason_phrase}]")
         print(json)
 
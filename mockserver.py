@@ -0,0 +1,214 @@
+from typing import Callable, Optional, Self
+from request import HTTPRequest
+from response import HTTPResponse
+from config import Config
+from http import HTTPStatus
+import argparse
+import asyncio
+import json
+import logging
+import random
+
+
+def parse_latency(spec: str, rng: random.Random = random) -> Callable[[], float]:
+    """Parse a latency distribution spec into a sampler returning seconds
+
+    Supported forms: "constant:S", "uniform:LOW:HIGH", "exponential:MEAN"
+    and "lognormal:MU:SIGMA".
+    """
+    kind, *params = spec.split(':')
+    params = [float(p) for p in params]
+    if kind == 'constant' and len(params) == 1:
+        return lambda: params[0]
+    if kind == 'uniform' and len(params) == 2:
+        return lambda: rng.uniform(*params)
+    if kind == 'exponential' and len(params) == 1:
+        return lambda: rng.expovariate(1 / params[0]) if params[0] > 0 else 0.0
+    if kind == 'lognormal' and len(params) == 2:
+        return lambda: rng.lognormvariate(*params)
+    raise ValueError(f"Invalid latency distribution: {spec}")
+
+
+def reason_phrase(status_code: int) -> str:
+    """Standard reason phrase of a status code, or a generic one for non-standard codes"""
+    try:
+        return HTTPStatus(status_code).phrase
+    except ValueError:
+        return 'Unknown Status'
+
+
+def status_code(value: str) -> int:
+    """argparse type for an HTTP status code"""
+    code = int(value)
+    if not 100 <= code <= 599:
+        raise argparse.ArgumentTypeError(f"invalid status code: {value}")
+    return code
+
+
+class MockSMSServer:
+    """Local stand-in for the SMS provider API
+
+    Connections are kept alive and pipelined requests are answered in order.
+    Responses can be delayed by a latency distribution and replaced by
+    injected faults.
+    """
+
+    host: str
+    port: int
+    auth_username: Optional[str] = None
+    auth_password: Optional[str] = None
+    fault_rate: float
+    fault_status: int
+    retry_after: Optional[int]
+    requests_served: int = 0
+    _latency: Optional[Callable[[], float]]
+    _server: Optional[asyncio.Server] = None
+    _connections: dict
+
+    def __init__(self, host: str = '127.0.0.1', port: int = 0, *, authorization: dict = None,
+                 latency: Optional[Callable[[], float]] = None, fault_rate: float = 0.0,
+                 fault_status: int = 429, retry_after: Optional[int] = None, seed: Optional[int] = None):
+        self.host = host
+        self.port = port
+        self._latency = latency
+        self.fault_rate = fault_rate
+        if not 100 <= fault_status <= 599:
+            raise ValueError(f"Invalid fault status code: {fault_status}")
+        self.fault_status = fault_status
+        self.retry_after = retry_after
+        self._rng = random.Random(seed)
+        self._connections = {}
+        if authorization is not None:
+            self.auth_username = authorization['username']
+            self.auth_password = authorization['password']
+
+    def _error(self, status_code: int, message: str, headers: dict = None) -> HTTPResponse:
+        return HTTPResponse(json.dumps({'error': message}), status_code, reason_phrase=reason_phrase(status_code),
+                            content_type='application/json', headers=headers)
+
+    def respond(self, binary_data: bytes) -> HTTPResponse:
+        """Build the response to a single raw request"""
+        try:
+            request = HTTPRequest.from_bytes(binary_data)
+        except (ValueError, IndexError):
+            return self._error(400, 'Malformed request')
+        if request.path != '/send_sms':
+            return self._error(404, 'Not found')
+        if request.method != 'POST':
+            return self._error(405, 'Method not allowed')
+        if self.auth_username is not None and (request.auth_username, request.auth_password) != (self.auth_username, self.auth_password):
+            return self._error(401, 'Unauthorized')
+        if self.fault_rate and self._rng.random() < self.fault_rate:
+            headers = {'Retry-After': str(self.retry_after)} if self.retry_after is not None else None
+            return self._error(self.fault_status, reason_phrase(self.fault_status), headers)
+        try:
+            payload = json.loads(request.payload)
+            if not all(isinstance(payload.get(key), str) for key in ('sender', 'recipient', 'message')):
+                raise ValueError
+        except (ValueError, AttributeError):
+            return self._error(400, 'Invalid parameters')
+        self.requests_served += 1
+        return HTTPResponse(json.dumps({'status': 'success', 'message_id': str(self.requests_served)}),
+                            content_type='application/json')
+
+    async def _write_responses(self, pending: asyncio.Queue, writer: asyncio.StreamWriter) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            item = await pending.get()
+            if item is None:
+                return
+            due, data = item
+            delay = due - loop.time()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            writer.write(data)
+            # Coalesce pipelined responses into as few writes as possible
+            if pending.empty():
+                await writer.drain()
+
+    async def _handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        loop = asyncio.get_running_loop()
+        pending = asyncio.Queue()
+        self._connections[writer] = asyncio.current_task()
+        responder = asyncio.create_task(self._write_responses(pending, writer))
+        try:
+            while not responder.done():
+                head = await reader.readuntil(b'\r\n\r\n')
+                content_length = int(head.split(b'Content-Length: ')[1].split(b'\r\n')[0]) if b'Content-Length: ' in head else 0
+                received = head + await reader.readexactly(content_length)
+                due = loop.time() + (self._latency() if self._latency is not None else 0.0)
+                pending.put_nowait((due, self.respond(received).to_bytes()))
+        except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, ConnectionError, ValueError):
+            pass
+        finally:
+            pending.put_nowait(None)
+            try:
+                await responder
+            except ConnectionError:
+                pass
+            self._connections.pop(writer, None)
+            writer.close()
+            try:
+                await writer.wait_closed()
+            except ConnectionError:
+                pass
+
+    async def start(self) -> None:
+        """Start listening"""
+        self._server = await asyncio.start_server(self._handle_connection, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+        logging.info(f"Mock server listening on {self.host}:{self.port}")
+
+    async def close(self) -> None:
+        """Stop listening and close the server"""
+        if self._server is None:
+            return
+        self._server.close()
+        # Kept-alive connections would otherwise hold wait_closed() open
+        handlers = list(self._connections.values())
+        for writer in list(self._connections):
+            writer.close()
+        await self._server.wait_closed()
+        # Let handlers finish their cleanup before the caller's loop goes away
+        await asyncio.gather(*handlers, return_exceptions=True)
+        self._server = None
+
+    async def serve_forever(self) -> None:
+        """Serve until cancelled"""
+        if self._server is None:
+            await self.start()
+        await self._server.serve_forever()
+
+    async def __aenter__(self) -> Self:
+        await self.start()
+        return self
+
+    async def __aexit__(self, *args):
+        await self.close()
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Mock SMS API server")
+    parser.add_argument('-c', '--config', type=str, help="Path to config file", default="config.toml")
+    parser.add_argument('-l', '--latency', type=str, help="Latency distribution, e.g. constant:0.01, uniform:0.005:0.02, exponential:0.01, lognormal:-4.6:0.5")
+    parser.add_argument('--fault-rate', type=float, help="Fraction of requests answered with a fault", default=0.0)
+    parser.add_argument('--fault-status', type=status_code, help="Status code of injected faults", default=429)
+    parser.add_argument('--retry-after', type=int, help="Retry-After value of injected faults, in seconds")
+    parser.add_argument('--seed', type=int, help="Random seed for latency and faults")
+    parser.add_argument('-d', '--debug', help="Print debug messages", action='store_true')
+    args = parser.parse_args()
+    if args.debug:
+        logging.basicConfig(
+            format='%(asctime)s %(levelname)-8s %(message)s',
+            level=logging.DEBUG,
+            datefmt='%Y-%m-%d %H:%M:%S')
+    Config(args.config)
+    rng = random.Random(args.seed)
+    server = MockSMSServer(Config.server['address'], Config.server['port'], authorization=Config.authorization,
+                           latency=args.latency and parse_latency(args.latency, rng),
+                           fault_rate=args.fault_rate, fault_status=args.fault_status,
+                           retry_after=args.retry_after, seed=args.seed)
+    await server.serve_forever()
+
+if __name__ == '__main__':
+    asyncio.run(main())
@@ -8,13 +8,15 @@ class HTTPResponse:
     body: str
     http_version: str
     content_type: Optional[str]
+    headers: dict
 
-    def __init__(self, body: str, status_code: int = 200, *, reason_phrase = 'OK', http_version="1.1", content_type: Optional[str] = None):
+    def __init__(self, body: str, status_code: int = 200, *, reason_phrase = 'OK', http_version="1.1", content_type: Optional[str] = None, headers: dict = None):
         self.status_code = status_code
         self.reason_phrase = reason_phrase
         self.body = body
         self.http_version = http_version
         self.content_type = content_type
+        self.headers = {} if headers is None else headers
 
 
     def get_content_length(self) -> int:
@@ -25,11 +27,11 @@ class HTTPResponse:
         """Convert to bytes according to the HTTP format"""
         content_length = self.get_content_length()
         content_type_line = f'\r\nContent-Type: {self.content_type}' if self.content_type is not None else ''
+        header_lines = ''.join(f'\r\n{name}: {value}' for name, value in self.headers.items())
         return f"""HTTP/{self.http_version} {self.status_code} {self.reason_phrase}\r
-Content-Length: {content_length}{content_type_line}\r
+Content-Length: {content_length}{content_type_line}{header_lines}\r
 \r
-{self.body}
-""".encode()
+{self.body}""".encode()
     
     @staticmethod
     def from_bytes(binary_data: bytes) -> Self:
@@ -40,12 +42,16 @@ Content-Length: {content_length}{content_type_line}\r
         status_code = int(_[1])
         reason_phrase = ' '.join(_[2:])
         content_type = None
+        headers = {}
 
         for idx, header in enumerate(s[1:], start=1):
             if header.startswith('Content-Type: '):
                 content_type = header.split(' ')[1]
+            elif header and not header.startswith('Content-Length: '):
+                name, _, value = header.partition(': ')
+                headers[name] = value
             if header == '':
                 break
 
         body = '\r\n'.join(s[idx+1:])
-        return HTTPResponse(body, status_code, reason_phrase=reason_phrase, http_version=http_version, content_type=content_type)
\ No newline at end of file
+        return HTTPResponse(body, status_code, reason_phrase=reason_phrase, http_version=http_version, content_type=content_type, headers=headers)
\ No newline at end of file
@@ -0,0 +1,235 @@
+from typing import List, Optional, Self, TextIO
+from response import HTTPResponse
+import abc
+import asyncio
+import csv
+import json
+import logging
+import queue
+import sqlite3
+import sys
+import threading
+import time
+
+FIELDS = ('timestamp', 'sender', 'recipient', 'status_code', 'reason_phrase', 'body', 'error')
+
+
+def result_record(sender: str, recipient: str, response: Optional[HTTPResponse] = None, error: Optional[str] = None) -> dict:
+    """Build a sink record for a completed or failed send"""
+    return {
+        'timestamp': time.time(),
+        'sender': sender,
+        'recipient': recipient,
+        'status_code': response.status_code if response is not None else None,
+        'reason_phrase': response.reason_phrase if response is not None else None,
+        'body': response.body if response is not None else None,
+        'error': error,
+    }
+
+
+class ResultSink(abc.ABC):
+    """Base class for sinks persisting send results in batches
+
+    Records are handed to a background thread, so the event loop never
+    waits on I/O. A batch is flushed once it holds flush_size records or
+    flush_interval seconds after its first record, whichever comes first.
+    At most max_pending records wait for the thread: beyond that write()
+    blocks and awrite() waits, so a slow destination slows the sender down
+    instead of growing memory.
+    """
+
+    path: str
+    flush_size: int
+    flush_interval: float
+    _queue: queue.Queue
+    _thread: Optional[threading.Thread] = None
+    _error: Optional[BaseException] = None
+
+    def __init__(self, path: str, *, flush_size: int = 1000, flush_interval: float = 1.0, max_pending: int = 10000):
+        self.path = path
+        self.flush_size = flush_size
+        self.flush_interval = flush_interval
+        self._queue = queue.Queue(maxsize=max_pending)
+
+    @abc.abstractmethod
+    def _open(self) -> None:
+        """Open the destination; called on the writer thread"""
+
+    @abc.abstractmethod
+    def _flush(self, batch: List[dict]) -> None:
+        """Persist a batch of records; called on the writer thread"""
+
+    @abc.abstractmethod
+    def _close(self) -> None:
+        """Close the destination; called on the writer thread"""
+
+    def _run(self) -> None:
+        try:
+            self._open()
+        except BaseException as e:
+            self._error = e
+            return
+        try:
+            batch = []
+            deadline = None
+            closing = False
+            while not closing:
+                timeout = None if deadline is None else max(deadline - time.monotonic(), 0)
+                try:
+                    record = self._queue.get(timeout=timeout)
+                except queue.Empty:
+                    pass
+                else:
+                    if record is None:
+                        closing = True
+                    else:
+                        batch.append(record)
+                        if deadline is None:
+                            deadline = time.monotonic() + self.flush_interval
+                if batch and (closing or len(batch) >= self.flush_size or time.monotonic() >= deadline):
+                    self._flush(batch)
+                    logging.debug(f"Flushed {len(batch)} results to {self.path}")
+                    batch = []
+                    deadline = None
+        except BaseException as e:
+            self._error = e
+        finally:
+            self._close()
+
+    def open(self) -> None:
+        """Start the writer thread"""
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name=f'{type(self).__name__}({self.path})', daemon=True)
+            self._thread.start()
+
+    def _put(self, record: Optional[dict]) -> None:
+        # Wake up periodically so a dead writer thread cannot block us forever
+        while True:
+            if self._error is not None:
+                raise self._error
+            try:
+                self._queue.put(record, timeout=0.1)
+                return
+            except queue.Full:
+                pass
+
+    def write(self, record: dict) -> None:
+        """Queue a record for writing, blocking while the queue is full"""
+        self._put(record)
+
+    async def awrite(self, record: dict) -> None:
+        """Queue a record for writing, waiting without blocking the event loop while the queue is full"""
+        if self._error is not None:
+            raise self._error
+        try:
+            self._queue.put_nowait(record)
+        except queue.Full:
+            await asyncio.to_thread(self._put, record)
+
+    def close(self) -> None:
+        """Flush pending records and stop the writer thread"""
+        if self._thread is None:
+            return
+        try:
+            self._put(None)
+        finally:
+            self._thread.join()
+            self._thread = None
+        if self._error is not None:
+            raise self._error
+
+    async def aclose(self) -> None:
+        """Close without blocking the event loop"""
+        await asyncio.to_thread(self.close)
+
+    def __enter__(self) -> Self:
+        self.open()
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    async def __aenter__(self) -> Self:
+        self.open()
+        return self
+
+    async def __aexit__(self, *args):
+        await self.aclose()
+
+
+class _FileSink(ResultSink):
+    """Sink writing to a text file, or to stdout if path is "-" """
+
+    _file: TextIO
+
+    def _open(self) -> None:
+        self._file = sys.stdout if self.path == '-' else open(self.path, 'a', newline='')
+
+    def _close(self) -> None:
+        self._file.flush()
+        if self._file is not sys.stdout:
+            self._file.close()
+
+
+class JSONLSink(_FileSink):
+    """Sink appending one JSON object per line"""
+
+    def _flush(self, batch: List[dict]) -> None:
+        self._file.write(''.join(json.dumps(record) + '\n' for record in batch))
+        self._file.flush()
+
+
+class CSVSink(_FileSink):
+    """Sink appending CSV rows, with a header row for a new file"""
+
+    _writer: csv.DictWriter
+
+    def _open(self) -> None:
+        super()._open()
+        self._writer = csv.DictWriter(self._file, FIELDS)
+        if self._file is sys.stdout or self._file.tell() == 0:
+            self._writer.writeheader()
+
+    def _flush(self, batch: List[dict]) -> None:
+        self._writer.writerows(batch)
+        self._file.flush()
+
+
+class SQLiteSink(ResultSink):
+    """Sink inserting into a "results" table, one transaction per batch"""
+
+    _connection: sqlite3.Connection
+
+    def _open(self) -> None:
+        # sqlite3 connections may only be used from the thread that created them
+        self._connection = sqlite3.connect(self.path)
+        self._connection.execute(f"CREATE TABLE IF NOT EXISTS results ({', '.join(FIELDS)})")
+        self._connection.commit()
+
+    def _flush(self, batch: List[dict]) -> None:
+        with self._connection:
+            self._connection.executemany(
+                f"INSERT INTO results VALUES ({', '.join('?' * len(FIELDS))})",
+                [tuple(record.get(field) for field in FIELDS) for record in batch])
+
+    def _close(self) -> None:
+        self._connection.close()
+
+
+SINKS = {
+    'jsonl': JSONLSink,
+    'csv': CSVSink,
+    'sqlite': SQLiteSink,
+}
+
+
+def open_sink(path: str, format: Optional[str] = None, **kwargs) -> ResultSink:
+    """Create a sink, inferring its format from the file extension if not given"""
+    if format is None:
+        extension = path.rsplit('.', 1)[-1].lower()
+        format = {'db': 'sqlite', 'sqlite3': 'sqlite'}.get(extension, extension)
+        if path == '-':
+            format = 'jsonl'
+    if format not in SINKS:
+        raise ValueError(f"Unknown result sink format: {format}")
+    return SINKS[format](path, **kwargs)
@@ -6,6 +6,9 @@ from request import HTTPRequestFactory
 from response import HTTPResponse
 import json
 
+# Errors a request can fail with on a broken connection, a timeout or a malformed response
+REQUEST_ERRORS = (OSError, TimeoutError, asyncio.IncompleteReadError, asyncio.LimitOverrunError, ValueError, IndexError)
+
 class SMSClient:
     """SMS API Client class"""
     
@@ -15,17 +18,33 @@ class SMSClient:
     _writer: asyncio.StreamWriter
     _request_factory: HTTPRequestFactory
     connected: bool = False
+    _stale: bool = False
 
     def __init__(self, config: config.Config):
         self.server_address = config.server['address']
         self.server_port = config.server['port']
         self._request_factory = HTTPRequestFactory(config.server['hostname'], authorization=config.authorization, http_version=config.http['version'])
 
+    def reconfigure(self, config: config.Config) -> None:
+        """Apply new config without interrupting a request in flight
+
+        Credentials and headers apply to the next request. If the endpoint
+        changed, the connection is recycled before the next request.
+        """
+        self._request_factory = HTTPRequestFactory(config.server['hostname'], authorization=config.authorization, http_version=config.http['version'])
+        endpoint = (config.server['address'], config.server['port'])
+        if endpoint != (self.server_address, self.server_port):
+            logging.info(f"Endpoint changed to {endpoint[0]}:{endpoint[1]}")
+            self.server_address, self.server_port = endpoint
+            self._stale = self.connected
+
 
     async def request(self, sender: str, recipient: str, message: str) -> Tuple[HTTPResponse, dict]:
         """Send "Send SMS" request to server"""
         if not self.connected:
             raise ConnectionError("Not connected: run connect()")
+        if self._stale:
+            await self.reconnect()
         
         request = self._request_factory.build('POST', '/send_sms', json.dumps({
             'sender': sender,
@@ -56,6 +75,15 @@ class SMSClient:
         logging.info(f"Connection to {self.server_address}:{self.server_port} established")
         self.connected = True
 
+    async def reconnect(self) -> None:
+        """Replace the connection, e.g. after an error or an endpoint change"""
+        try:
+            await self.__aexit__()
+        except OSError:
+            self.connected = False
+            self._stale = False
+        await self.connect()
+
     async def __aenter__(self):
         await self.connect()
         return self
@@ -67,4 +95,5 @@ class SMSClient:
         self._writer.close()
         await self._writer.wait_closed()
         logging.info("Connection closed")
-        self.connected = False
\ No newline at end of file
+        self.connected = False
+        self._stale = False
\ No newline at end of file
@@ -0,0 +1,12 @@
+import pytest
+from types import SimpleNamespace
+
+@pytest.fixture
+def client_config():
+    """Factory of SMSClient configs pointing at a local server"""
+    def make(host, port, authorization=None):
+        return SimpleNamespace(
+            server={'address': host, 'port': port, 'hostname': f'{host}:{port}'},
+            authorization=authorization,
+            http={'version': '1.1'})
+    return make
@@ -0,0 +1,158 @@
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import pytest
+import asyncio
+import io
+import json
+from campaign import normalize_numbers, CampaignReader, CampaignAborted, Checkpoint, run
+from mockserver import MockSMSServer
+from sinks import JSONLSink
+
+CSV = b"recipient,message\n+79000000001,one\n8 (900) 000-00-02,two\n\nnot a number,three\n9000000004,\n"
+
+class Unseekable(io.BytesIO):
+    def seekable(self):
+        return False
+
+def test_normalize_numbers():
+    """Test normalization of common number formats in a batch"""
+    assert normalize_numbers(['+7 900 000-00-01', '89000000002', '79000000003', '9000000004',
+                              '0044 20 7946 0000', 'abc', None, '+0123456789']) == [
+        '+79000000001', '+79000000002', '+79000000003', '+79000000004',
+        '+442079460000', None, None, None]
+
+def test_normalize_numbers_other_country():
+    """Test that the trunk prefix follows the country code"""
+    assert normalize_numbers(['07911 123456', '80012345678', '447911123456', '7911123456'], '44') == [
+        '+447911123456', None, '+447911123456', '+447911123456']
+    assert normalize_numbers(['89000000002'], '44', trunk_prefix='8') == ['+449000000002']
+
+def test_reader_batches():
+    """Test that rows are read in batches with the offset past each batch"""
+    reader = CampaignReader(io.BytesIO(CSV), 'csv', batch_size=2)
+    rows, offset = reader.read_batch()
+    assert [row['message'] for row in rows] == ['one', 'two']
+    assert CSV[:offset].endswith(b'two\n')
+    rows, _ = reader.read_batch()
+    assert [row['recipient'] for row in rows] == ['not a number', '9000000004']
+    assert reader.read_batch()[0] == []
+
+def test_reader_byte_order_mark():
+    """Test that a UTF-8 BOM does not corrupt the first column name"""
+    reader = CampaignReader(io.BytesIO(b'\xef\xbb\xbf' + CSV), 'csv')
+    rows, _ = reader.read_batch()
+    assert rows[0]['recipient'] == '+79000000001'
+    reader = CampaignReader(io.BytesIO(b'\xef\xbb\xbf{"recipient": "+79000000001"}\n'), 'jsonl')
+    assert reader.read_batch()[0] == [{'recipient': '+79000000001'}]
+
+@pytest.mark.parametrize('stream_type', [io.BytesIO, Unseekable])
+def test_reader_resume(stream_type):
+    """Test resuming from an offset, with and without seeking"""
+    offset = CSV.index(b'8 (900)')
+    reader = CampaignReader(stream_type(CSV), 'csv', offset=offset)
+    rows, _ = reader.read_batch()
+    assert [row['message'] for row in rows] == ['two', 'three', '']
+
+def test_reader_jsonl():
+    """Test JSONL input, with malformed lines read as empty rows"""
+    reader = CampaignReader(io.BytesIO(b'{"recipient": "+79000000001"}\n[1]\n{\n'), 'jsonl')
+    rows, _ = reader.read_batch()
+    assert rows == [{'recipient': '+79000000001'}, {}, {}]
+
+def test_checkpoint(tmp_path):
+    """Test checkpoint persistence"""
+    checkpoint = Checkpoint(str(tmp_path / "checkpoint.json"))
+    assert checkpoint.load() == 0
+    checkpoint.save(42)
+    assert checkpoint.load() == 42
+
+@pytest.mark.asyncio
+async def test_run_and_resume(tmp_path, client_config):
+    """Test a campaign run, its results and resuming from its checkpoint"""
+    checkpoint = Checkpoint(str(tmp_path / "checkpoint.json"))
+    results = tmp_path / "results.jsonl"
+    async with MockSMSServer() as server:
+        config = client_config(server.host, server.port)
+        with JSONLSink(str(results)) as sink:
+            stats = await run(config, CampaignReader(io.BytesIO(CSV), 'csv', batch_size=2), sender='+70000000000',
+                              message='default', connections=2, sink=sink, checkpoint=checkpoint)
+        assert (stats.sent, stats.failed, stats.invalid) == (3, 0, 1)
+        assert checkpoint.load() == len(CSV)
+        assert server.requests_served == 3
+
+        stats = await run(config, CampaignReader(io.BytesIO(CSV), 'csv', offset=checkpoint.load()),
+                          sender='+70000000000', message='default', checkpoint=checkpoint)
+        assert (stats.sent, stats.invalid) == (0, 0)
+    records = [json.loads(line) for line in results.read_text().splitlines()]
+    assert sorted(r['recipient'] for r in records if r['error'] is None) == ['+79000000001', '+79000000002', '+79000000004']
+
+@pytest.mark.asyncio
+async def test_run_connection_failure(client_config):
+    """Test that an unreachable server fails the run instead of hanging"""
+    async with MockSMSServer() as server:
+        port = server.port
+    config = client_config('127.0.0.1', port)
+    with pytest.raises(OSError):
+        await run(config, CampaignReader(io.BytesIO(CSV * 100), 'csv', batch_size=2), sender='+70000000000',
+                  message='default', connections=1)
+
+@pytest.mark.asyncio
+async def test_run_retries_transient_faults(tmp_path, client_config):
+    """Test that 429 and 5xx responses are retried until the rows are sent"""
+    checkpoint = Checkpoint(str(tmp_path / "checkpoint.json"))
+    async with MockSMSServer(fault_rate=0.5, fault_status=503, retry_after=0, seed=3) as server:
+        config = client_config(server.host, server.port)
+        stats = await run(config, CampaignReader(io.BytesIO(CSV), 'csv', batch_size=2), sender='+70000000000',
+                          message='default', connections=2, checkpoint=checkpoint, max_retries=20)
+    assert (stats.sent, stats.failed) == (3, 0)
+    assert stats.retried > 0
+    assert checkpoint.load() == len(CSV)
+
+@pytest.mark.asyncio
+async def test_run_aborts_without_passing_failed_rows(tmp_path, client_config):
+    """Test that an outage stops the run instead of checkpointing past unsent rows"""
+    checkpoint = Checkpoint(str(tmp_path / "checkpoint.json"))
+    async with MockSMSServer(fault_rate=1.0, fault_status=503, retry_after=0) as server:
+        config = client_config(server.host, server.port)
+        with pytest.raises(CampaignAborted) as aborted:
+            await run(config, CampaignReader(io.BytesIO(CSV), 'csv', batch_size=2), sender='+70000000000',
+                      message='default', connections=2, checkpoint=checkpoint, max_retries=2)
+    assert aborted.value.stats.sent == 0
+    assert checkpoint.load() == 0
+
+@pytest.mark.asyncio
+async def test_run_retries_unanswered_requests(tmp_path, client_config):
+    """Test that a server that never answers is retried on a new connection, then stops the run"""
+    connections = 0
+
+    async def ignore(reader, writer):
+        nonlocal connections
+        connections += 1
+        await reader.read()
+        writer.close()
+
+    checkpoint = Checkpoint(str(tmp_path / "checkpoint.json"))
+    server = await asyncio.start_server(ignore, '127.0.0.1', 0)
+    config = client_config('127.0.0.1', server.sockets[0].getsockname()[1])
+    async with server:
+        with pytest.raises(CampaignAborted) as aborted:
+            await asyncio.wait_for(
+                run(config, CampaignReader(io.BytesIO(CSV), 'csv'), sender='+70000000000', message='default',
+                    connections=1, checkpoint=checkpoint, max_retries=2, backoff=0, timeout=0.1), 5)
+    assert aborted.value.stats.retried == 2
+    # The first connection, then a fresh one after each of the three timed out attempts
+    assert connections == 4
+    assert checkpoint.load() == 0
+
+@pytest.mark.asyncio
+async def test_run_permanent_rejection_is_done(tmp_path, client_config):
+    """Test that rows rejected with a 4xx other than 429 are not retried"""
+    checkpoint = Checkpoint(str(tmp_path / "checkpoint.json"))
+    async with MockSMSServer(authorization={'username': 'user', 'password': 'XXXX'}) as server:
+        config = client_config(server.host, server.port, {'username': 'user', 'password': 'wrong'})
+        stats = await run(config, CampaignReader(io.BytesIO(CSV), 'csv'), sender='+70000000000',
+                          message='default', checkpoint=checkpoint)
+    assert (stats.sent, stats.failed, stats.retried) == (0, 3, 0)
+    assert checkpoint.load() == len(CSV)
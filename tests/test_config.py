@@ -0,0 +1,162 @@
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import pytest
+import asyncio
+from config import ConfigSnapshot, ConfigWatcher
+
+CONFIG = """
+[server]
+address = "127.0.0.1"
+port = {port}
+hostname = "127.0.0.1:{port}"
+
+[authorization]
+username = "user"
+password = "XXXX"
+
+[http]
+version = "1.1"
+"""
+
+def write_config(path, port, mtime):
+    path.write_text(CONFIG.format(port=port))
+    os.utime(path, (mtime, mtime))
+
+def test_snapshot_load(tmp_path):
+    """Test that a snapshot holds the config sections"""
+    path = tmp_path / "config.toml"
+    write_config(path, 4010, 1)
+    snapshot = ConfigSnapshot.load(str(path))
+    assert snapshot.server['port'] == 4010
+    assert snapshot.authorization == {'username': 'user', 'password': 'XXXX'}
+
+def test_watcher_publishes_changes(tmp_path):
+    """Test that a changed file swaps in a new snapshot and notifies subscribers"""
+    path = tmp_path / "config.toml"
+    write_config(path, 4010, 1)
+    watcher = ConfigWatcher(str(path))
+    old = watcher.current
+    received = []
+    watcher.subscribe(received.append)
+
+    assert watcher.check() is False
+    write_config(path, 4011, 2)
+    assert watcher.check() is True
+    assert watcher.current.server['port'] == 4011
+    assert received == [watcher.current]
+    assert old.server['port'] == 4010
+
+def test_watcher_keeps_last_good_config(tmp_path):
+    """Test that an unparsable file does not replace the current snapshot"""
+    path = tmp_path / "config.toml"
+    write_config(path, 4010, 1)
+    watcher = ConfigWatcher(str(path))
+    path.write_text("[server\n")
+    os.utime(path, (2, 2))
+    assert watcher.check() is False
+    assert watcher.current.server['port'] == 4010
+
+def test_watcher_rejects_missing_keys(tmp_path):
+    """Test that a file that parses but lacks required keys is a failed reload"""
+    path = tmp_path / "config.toml"
+    write_config(path, 4010, 1)
+    watcher = ConfigWatcher(str(path))
+    received = []
+    watcher.subscribe(received.append)
+    path.write_text(CONFIG.format(port=4011).replace('hostname = "127.0.0.1:4011"\n', ''))
+    os.utime(path, (2, 2))
+    assert watcher.check() is False
+    assert watcher.current.server['port'] == 4010
+    assert received == []
+
+def test_snapshot_missing_section():
+    """Test that a snapshot needs every required section"""
+    with pytest.raises(ValueError):
+        ConfigSnapshot({'server': {'address': '127.0.0.1', 'port': 4010, 'hostname': 'localhost'}})
+
+def test_watcher_isolates_failing_subscribers(tmp_path):
+    """Test that one failing subscriber does not keep the others on the old config"""
+    path = tmp_path / "config.toml"
+    write_config(path, 4010, 1)
+    watcher = ConfigWatcher(str(path))
+    received = []
+
+    def fail(snapshot):
+        raise KeyError('hostname')
+
+    watcher.subscribe(fail)
+    watcher.subscribe(received.append)
+    write_config(path, 4011, 2)
+    assert watcher.check() is True
+    assert [snapshot.server['port'] for snapshot in received] == [4011]
+
+@pytest.mark.asyncio
+async def test_watcher_publishes_in_background(tmp_path):
+    """Test that a started watcher picks up a changed file by itself"""
+    path = tmp_path / "config.toml"
+    write_config(path, 4010, 1)
+    watcher = ConfigWatcher(str(path), interval=0.01)
+    received = []
+    watcher.subscribe(received.append)
+    watcher.start()
+    try:
+        write_config(path, 4011, 2)
+        for _ in range(300):
+            if received:
+                break
+            await asyncio.sleep(0.01)
+    finally:
+        await watcher.stop()
+    assert [snapshot.server['port'] for snapshot in received] == [4011]
+    assert watcher.current.server['port'] == 4011
+    await watcher.stop()
+
+def test_snapshot_keeps_top_level_scalars(tmp_path):
+    """Test that top-level scalar keys are accepted and kept"""
+    path = tmp_path / "config.toml"
+    path.write_text("debug = true\n" + CONFIG.format(port=4010))
+    snapshot = ConfigSnapshot.load(str(path))
+    assert snapshot.debug is True
+    assert snapshot.server['port'] == 4010
+
+def test_watcher_retries_failed_file_with_same_mtime(tmp_path):
+    """Test that a file fixed within the same mtime tick as a broken write is picked up"""
+    path = tmp_path / "config.toml"
+    write_config(path, 4711, 1)
+    watcher = ConfigWatcher(str(path))
+    path.write_text("[server\n")
+    os.utime(path, (2, 2))
+    assert watcher.check() is False
+    write_config(path, 4713, 2)
+    assert watcher.check() is True
+    assert watcher.current.server['port'] == 4713
+
+@pytest.mark.asyncio
+async def test_watch_survives_unexpected_errors(tmp_path, monkeypatch):
+    """Test that an unexpected error in a check does not stop background watching"""
+    path = tmp_path / "config.toml"
+    write_config(path, 4711, 1)
+    watcher = ConfigWatcher(str(path), interval=0.01)
+    check = watcher.check
+    calls = []
+
+    def flaky_check():
+        calls.append(None)
+        if len(calls) == 1:
+            raise TypeError("unexpected")
+        return check()
+
+    monkeypatch.setattr(watcher, 'check', flaky_check)
+    watcher.start()
+    try:
+        write_config(path, 4713, 2)
+        for _ in range(300):
+            if watcher.current.server['port'] == 4713:
+                break
+            await asyncio.sleep(0.01)
+    finally:
+        await watcher.stop()
+    assert len(calls) > 1
+    assert watcher.current.server['port'] == 4713
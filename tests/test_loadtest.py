@@ -0,0 +1,110 @@
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import pytest
+import asyncio
+import json
+from loadtest import parse_profile, schedule, percentile, replay_messages, synthetic_messages, run, LoadStats
+from mockserver import MockSMSServer
+
+def test_parse_profile():
+    """Test ramp profile parsing"""
+    assert parse_profile("100:10,100:60") == [(100.0, 10.0), (100.0, 60.0)]
+
+def test_parse_profile_invalid():
+    """Test rejection of malformed profile stages"""
+    with pytest.raises(ValueError):
+        parse_profile("100")
+    with pytest.raises(ValueError):
+        parse_profile("100:0")
+
+def test_schedule_constant_rate():
+    """Test that a steady stage produces evenly spaced sends"""
+    offsets = list(schedule([(10, 2)], start_rate=10))
+    assert len(offsets) == 20
+    assert offsets[0] == pytest.approx(0.1)
+    assert offsets[-1] == pytest.approx(2.0)
+
+def test_schedule_linear_ramp():
+    """Test that a ramp from zero produces the integral of its rate"""
+    offsets = list(schedule([(10, 2), (10, 1)]))
+    # 0 -> 10 req/s over 2s gives 10 sends, then 10 more during the hold
+    assert len(offsets) == 20
+    assert offsets == sorted(offsets)
+    assert offsets[9] == pytest.approx(2.0)
+    # Gaps shrink while the rate ramps up
+    assert offsets[1] - offsets[0] > offsets[9] - offsets[8]
+
+def test_percentile():
+    """Test nearest-rank percentiles"""
+    values = [float(i) for i in range(1, 101)]
+    assert percentile(values, 50) == 50.0
+    assert percentile(values, 99) == 99.0
+    assert percentile(values, 100) == 100.0
+    assert percentile([1.0], 0) == 1.0
+
+def test_replay_messages(tmp_path):
+    """Test that recorded traffic is replayed cyclically"""
+    path = tmp_path / "traffic.jsonl"
+    path.write_text('\n'.join(json.dumps({'sender': 's', 'recipient': str(i), 'message': 'm'}) for i in range(2)) + '\n')
+    messages = replay_messages(str(path))
+    assert [next(messages)[1] for _ in range(3)] == ['0', '1', '0']
+
+def test_stats_error_rate():
+    """Test that HTTP errors and exceptions both count as failures"""
+    stats = LoadStats()
+    stats.record(0.01, status_code=200)
+    stats.record(0.02, status_code=429)
+    stats.record(0.03, error='ConnectionResetError')
+    assert stats.total == 3
+    assert stats.failed == 2
+
+@pytest.mark.asyncio
+async def test_run_against_mock_server(client_config):
+    """Test a short run end to end"""
+    async with MockSMSServer(fault_rate=0.5, seed=1) as server:
+        config = client_config(server.host, server.port)
+        stats = await run(config, [(200, 0.1)], synthetic_messages('+70000000000', 10, seed=1), connections=2)
+    assert stats.total == 10
+    assert set(stats.statuses) <= {200, 429}
+    assert 0 < stats.failed < 10
+
+@pytest.mark.asyncio
+async def test_run_fails_fast_without_server(client_config):
+    """Test that a run stops as soon as its connections fail instead of running out the profile"""
+    async with MockSMSServer() as server:
+        port = server.port
+    config = client_config('127.0.0.1', port)
+    with pytest.raises(OSError):
+        await asyncio.wait_for(run(config, [(10, 60)], synthetic_messages('+70000000000', 10), connections=2), 5)
+
+@pytest.mark.asyncio
+async def test_run_counts_malformed_responses(client_config):
+    """Test that unparsable responses are counted as errors rather than ending the run"""
+    async def respond(reader, writer):
+        while await reader.read(65536):
+            writer.write(b'garbage\r\n\r\n')
+        writer.close()
+
+    server = await asyncio.start_server(respond, '127.0.0.1', 0)
+    config = client_config('127.0.0.1', server.sockets[0].getsockname()[1])
+    async with server:
+        stats = await run(config, [(100, 0.05)], synthetic_messages('+70000000000', 10), connections=1)
+    assert stats.total == 2
+    assert stats.failed == 2
+
+@pytest.mark.asyncio
+async def test_run_times_out_unresponsive_server(client_config):
+    """Test that requests to a server that never answers are recorded as timeouts"""
+    async def ignore(reader, writer):
+        await reader.read()
+        writer.close()
+
+    server = await asyncio.start_server(ignore, '127.0.0.1', 0)
+    config = client_config('127.0.0.1', server.sockets[0].getsockname()[1])
+    async with server:
+        stats = await asyncio.wait_for(
+            run(config, [(100, 0.05)], synthetic_messages('+70000000000', 10), connections=1, timeout=0.1), 5)
+    assert stats.total == 2
+    assert stats.errors == {'TimeoutError': 2}
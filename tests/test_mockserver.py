@@ -0,0 +1,126 @@
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import pytest
+import asyncio
+import random
+from mockserver import MockSMSServer, parse_latency
+from smsclient import SMSClient
+from request import HTTPRequest
+from response import HTTPResponse
+
+AUTHORIZATION = {'username': 'user', 'password': 'XXXX'}
+
+@pytest.mark.asyncio
+async def test_keep_alive(client_config):
+    """Test that several sends share one connection"""
+    async with MockSMSServer(authorization=AUTHORIZATION) as server:
+        async with SMSClient(client_config(server.host, server.port, AUTHORIZATION)) as client:
+            ids = []
+            for _ in range(3):
+                response, body = await client.request("+79123456789", "+79098765432", "Hello")
+                assert response.status_code == 200
+                ids.append(body['message_id'])
+    assert ids == ['1', '2', '3']
+
+@pytest.mark.asyncio
+async def test_pipelining():
+    """Test that pipelined requests are answered in order"""
+    async with MockSMSServer(latency=parse_latency('uniform:0:0.01', random.Random(1))) as server:
+        reader, writer = await asyncio.open_connection(server.host, server.port)
+        payloads = [f'{{"sender": "a", "recipient": "b", "message": "{i}"}}' for i in range(3)]
+        writer.write(b''.join(HTTPRequest('localhost', 'POST', '/send_sms', p).to_bytes() for p in payloads)
+                     + HTTPRequest('localhost', 'GET', '/send_sms', '').to_bytes())
+        await writer.drain()
+        statuses = []
+        for _ in range(4):
+            head = await reader.readuntil(b'\r\n\r\n')
+            content_length = int(head.split(b'Content-Length: ')[1].split(b'\r\n')[0])
+            statuses.append(HTTPResponse.from_bytes(head + await reader.readexactly(content_length)).status_code)
+        writer.close()
+        await writer.wait_closed()
+    assert statuses == [200, 200, 200, 405]
+
+@pytest.mark.asyncio
+async def test_fault_injection(client_config):
+    """Test injected rate-limit faults with Retry-After"""
+    async with MockSMSServer(fault_rate=1.0, fault_status=429, retry_after=2) as server:
+        async with SMSClient(client_config(server.host, server.port, AUTHORIZATION)) as client:
+            response, body = await client.request("+79123456789", "+79098765432", "Hello")
+    assert response.status_code == 429
+    assert response.reason_phrase == 'Too Many Requests'
+    assert response.headers['Retry-After'] == '2'
+    assert 'error' in body
+
+@pytest.mark.asyncio
+async def test_unauthorized(client_config):
+    """Test rejection of wrong credentials"""
+    async with MockSMSServer(authorization=AUTHORIZATION) as server:
+        async with SMSClient(client_config(server.host, server.port, {'username': 'user', 'password': 'wrong'})) as client:
+            response, _ = await client.request("+79123456789", "+79098765432", "Hello")
+    assert response.status_code == 401
+
+def test_respond_invalid_parameters():
+    """Test rejection of payloads missing required fields"""
+    server = MockSMSServer()
+    request = HTTPRequest('localhost', 'POST', '/send_sms', '{"sender": "a"}')
+    assert server.respond(request.to_bytes()).status_code == 400
+
+def test_parse_latency():
+    """Test latency distribution specs"""
+    assert parse_latency('constant:0.5')() == 0.5
+    assert 0.1 <= parse_latency('uniform:0.1:0.2')() <= 0.2
+    assert parse_latency('exponential:0.01')() >= 0
+    with pytest.raises(ValueError):
+        parse_latency('gamma:1')
+
+@pytest.mark.asyncio
+async def test_close_with_idle_connection():
+    """Test that closing does not wait for kept-alive clients to disconnect"""
+    server = MockSMSServer()
+    await server.start()
+    reader, writer = await asyncio.open_connection(server.host, server.port)
+    await asyncio.wait_for(server.close(), 3)
+    assert await reader.read() == b''
+    writer.close()
+
+@pytest.mark.asyncio
+async def test_non_standard_fault_status(client_config):
+    """Test that faults with non-standard status codes are still answered"""
+    async with MockSMSServer(fault_rate=1.0, fault_status=520) as server:
+        async with SMSClient(client_config(server.host, server.port, AUTHORIZATION)) as client:
+            response, _ = await client.request("+79123456789", "+79098765432", "Hello")
+    assert response.status_code == 520
+    assert response.reason_phrase == 'Unknown Status'
+
+def test_invalid_fault_status():
+    """Test rejection of fault status codes outside the HTTP range"""
+    with pytest.raises(ValueError):
+        MockSMSServer(fault_status=999)
+
+@pytest.mark.parametrize('raw', [b'GET / FOO\r\n\r\n', b'POST /send_sms HTTP/1.1\r\nAuthorization: Basic\r\n\r\n'])
+@pytest.mark.asyncio
+async def test_malformed_request_line(raw):
+    """Test that unparsable requests are answered with 400 instead of a dropped connection"""
+    async with MockSMSServer() as server:
+        reader, writer = await asyncio.open_connection(server.host, server.port)
+        writer.write(raw)
+        await writer.drain()
+        head = await reader.readuntil(b'\r\n\r\n')
+        writer.close()
+        await writer.wait_closed()
+    assert HTTPResponse.from_bytes(head).status_code == 400
+
+@pytest.mark.asyncio
+async def test_close_waits_for_handlers():
+    """Test that no connection handler outlives close()"""
+    server = MockSMSServer()
+    await server.start()
+    reader, writer = await asyncio.open_connection(server.host, server.port)
+    await asyncio.sleep(0.01)
+    handlers = list(server._connections.values())
+    assert handlers
+    await server.close()
+    assert all(handler.done() for handler in handlers)
+    writer.close()
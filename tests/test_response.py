@@ -47,7 +47,7 @@ class TestResponse:
         with proper HTTP format, including status line, headers, and body.
         """
         response = HTTPResponse(body="Hello, World!", status_code=200, reason_phrase="OK", http_version="1.1", content_type="text/plain")
-        expected_bytes = b"HTTP/1.1 200 OK\r\nContent-Length: 13\r\nContent-Type: text/plain\r\n\r\nHello, World!\n"
+        expected_bytes = b"HTTP/1.1 200 OK\r\nContent-Length: 13\r\nContent-Type: text/plain\r\n\r\nHello, World!"
         assert response.to_bytes() == expected_bytes
         assert response.to_bytes() == expected_bytes
     def test_to_bytes_with_empty_body(self):
@@ -56,7 +56,7 @@ class TestResponse:
         """
         response = HTTPResponse("")
         result = response.to_bytes()
-        expected = b"HTTP/1.1 200 OK\r\nContent-Length: 0\r\n\r\n\n"
+        expected = b"HTTP/1.1 200 OK\r\nContent-Length: 0\r\n\r\n"
         assert result == expected
         assert result == expected
         assert result == expected
@@ -66,5 +66,5 @@ class TestResponse:
         """
         response = HTTPResponse("Test body", content_type=None)
         result = response.to_bytes()
-        expected = b"HTTP/1.1 200 OK\r\nContent-Length: 9\r\n\r\nTest body\n"
+        expected = b"HTTP/1.1 200 OK\r\nContent-Length: 9\r\n\r\nTest body"
         assert result == expected
@@ -0,0 +1,108 @@
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import pytest
+import csv
+import json
+import sqlite3
+import time
+from response import HTTPResponse
+from sinks import ResultSink, JSONLSink, CSVSink, SQLiteSink, open_sink, result_record
+
+def records(n):
+    response = HTTPResponse('{"status": "success"}', content_type='application/json')
+    return [result_record('+79123456789', f'+7909876543{i}', response) for i in range(n)]
+
+def test_jsonl_sink(tmp_path):
+    """Test that all records are written as JSON lines on close"""
+    path = tmp_path / "results.jsonl"
+    with JSONLSink(str(path), flush_size=2) as sink:
+        for record in records(5):
+            sink.write(record)
+    lines = [json.loads(line) for line in path.read_text().splitlines()]
+    assert [line['recipient'] for line in lines] == [f'+7909876543{i}' for i in range(5)]
+    assert lines[0]['status_code'] == 200
+
+def test_csv_sink_appends_single_header(tmp_path):
+    """Test that reopening a CSV file does not repeat the header"""
+    path = tmp_path / "results.csv"
+    for _ in range(2):
+        with CSVSink(str(path)) as sink:
+            sink.write(result_record('+79123456789', '+79098765432', error='ConnectionResetError'))
+    rows = list(csv.DictReader(path.open()))
+    assert len(rows) == 2
+    assert rows[0]['error'] == 'ConnectionResetError'
+    assert rows[0]['status_code'] == ''
+
+@pytest.mark.asyncio
+async def test_sqlite_sink(tmp_path):
+    """Test batched inserts into SQLite"""
+    path = tmp_path / "results.db"
+    async with SQLiteSink(str(path), flush_size=3) as sink:
+        for record in records(7):
+            sink.write(record)
+    connection = sqlite3.connect(path)
+    assert connection.execute("SELECT COUNT(*) FROM results WHERE status_code = 200").fetchone() == (7,)
+    connection.close()
+
+def test_flush_interval(tmp_path):
+    """Test that a partial batch is flushed once the interval passes"""
+    path = tmp_path / "results.jsonl"
+    with JSONLSink(str(path), flush_size=1000, flush_interval=0.01) as sink:
+        sink.write(records(1)[0])
+        deadline = time.monotonic() + 5
+        while not (path.exists() and path.read_text()) and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert path.read_text().count('\n') == 1
+
+def test_write_error_surfaces_on_close(tmp_path):
+    """Test that a failing writer thread raises instead of dropping results"""
+    sink = JSONLSink(str(tmp_path / "missing" / "results.jsonl"))
+    sink.open()
+    with pytest.raises(OSError):
+        sink.close()
+
+def test_open_sink_format():
+    """Test format inference from the file extension"""
+    assert isinstance(open_sink('results.jsonl'), JSONLSink)
+    assert isinstance(open_sink('results.db'), SQLiteSink)
+    assert isinstance(open_sink('-'), JSONLSink)
+    assert isinstance(open_sink('results.txt', 'csv'), CSVSink)
+    with pytest.raises(ValueError):
+        open_sink('results.txt')
+
+def test_incomplete_sink_fails_on_creation():
+    """Test that a sink missing a hook cannot be created"""
+    class NoFlushSink(ResultSink):
+        def _open(self):
+            pass
+
+        def _close(self):
+            pass
+
+    with pytest.raises(TypeError):
+        NoFlushSink('results')
+
+@pytest.mark.asyncio
+async def test_awrite_is_bounded(tmp_path):
+    """Test that a slow sink holds at most max_pending queued records"""
+    class SlowSink(JSONLSink):
+        def _flush(self, batch):
+            time.sleep(0.005)
+            super()._flush(batch)
+
+    path = tmp_path / "results.jsonl"
+    async with SlowSink(str(path), flush_size=1, max_pending=2) as sink:
+        for record in records(20):
+            await sink.awrite(record)
+            assert sink._queue.qsize() <= 2
+    assert path.read_text().count('\n') == 20
+
+def test_full_queue_surfaces_writer_error(tmp_path):
+    """Test that writing into a full queue of a dead writer raises instead of hanging"""
+    sink = JSONLSink(str(tmp_path / "missing" / "results.jsonl"), max_pending=1)
+    sink.open()
+    with pytest.raises(OSError):
+        for record in records(5):
+            sink.write(record)
@@ -8,6 +8,7 @@ import json
 import asyncio
 import pytest_asyncio
 from smsclient import SMSClient, config, HTTPResponse  # Update import path
+from mockserver import MockSMSServer
 
 @pytest.fixture
 def mock_config():
@@ -143,4 +144,21 @@ def test_request_generation(mock_config):
     assert b'POST /send_sms HTTP/1.1' in request_bytes
     assert b'Content-Type: application/json' in request_bytes
     assert b'Authorization: Basic ' in request_bytes
-    assert b'Content-Length: ' in request_bytes
\ No newline at end of file
+    assert b'Content-Length: ' in request_bytes
+
+@pytest.mark.asyncio
+async def test_reconfigure_recycles_connection(client_config):
+    """Test that a new endpoint takes effect on the next request without a restart"""
+    def server_config(server, password):
+        return client_config(server.host, server.port, {'username': 'user', 'password': password})
+
+    async with MockSMSServer(authorization={'username': 'user', 'password': 'old'}) as old, \
+            MockSMSServer(authorization={'username': 'user', 'password': 'new'}) as new:
+        async with SMSClient(server_config(old, 'old')) as client:
+            response, _ = await client.request("+79123456789", "+79098765432", "Hello")
+            assert response.status_code == 200
+            client.reconfigure(server_config(new, 'new'))
+            response, _ = await client.request("+79123456789", "+79098765432", "Hello")
+            assert response.status_code == 200
+    assert old.requests_served == 1
+    assert new.requests_served == 1